@@ -0,0 +1,16 @@
+# Project: OSSEM
+# License: GPLv3
+
+""" OSSEM build tooling: turns the OSSEM-CDM, OSSEM-DM and OSSEM-DD yaml
+sources into the Jupyter Book docs and the parser configs.
+
+    python3 -m ossem build --help
+
+The resolved model written by the build can be queried without rebuilding it:
+
+    from ossem import get_entity, get_table, fields_for_event
+"""
+
+__version__ = '0.1.0'
+
+from ossem.model import Model, SnapshotError, load_model, get_entity, get_table, fields_for_event
@@ -0,0 +1,8 @@
+# Project: OSSEM
+# License: GPLv3
+
+import sys
+
+from ossem.cli import main
+
+sys.exit(main())
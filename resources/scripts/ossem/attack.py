@@ -0,0 +1,25 @@
+# Author: Roberto Rodriguez (@Cyb3rWard0g)
+# License: GPLv3
+
+import yaml
+
+def build_mappings(project, inputs):
+    """ build stage: aggregated ATT&CK data sources yaml and mappings table """
+    print("[+] Processing files inside attack_data_sources/event-mappings directory")
+    # Loop through all data source records to create one file for easy consumption
+    all_data_sources = []
+    for ds in inputs.attack_event_mappings():
+        all_data_sources.extend(ds)
+
+    print("[+] Writing one ATT&CK data sources YAML files..")
+    all_data_sources_yaml = yaml.dump(all_data_sources, sort_keys=False)
+
+    # ***** Creating Mappings Table *****
+    print("[+] Creating data soures mappings table.")
+    table_template = inputs.template('attack/ds_mapping_template.md')
+    markdown = table_template.render(datasources=all_data_sources)
+
+    return {
+        'attack_data_sources/event-mappings/all_data_sources.yml': all_data_sources_yaml,
+        'docs/attack/windows/ds_mapping_table.md': markdown
+    }
@@ -0,0 +1,97 @@
+# Project: OSSEM
+# License: GPLv3
+
+""" Memory used by the resolved CDM model, compact fields against attribute dicts
+
+    python3 -m ossem.benchmark [--root ROOT]
+
+The dict layout is the one the converter used before fields were compacted:
+one dict per prefixed attribute, a labeled copy of it per table and a deep
+copy of every entity and table when rendering its page.
+"""
+
+import argparse
+import copy
+import gc
+import tracemalloc
+
+from ossem import cdm
+from ossem.inputs import Inputs
+from ossem.project import Project
+
+
+def dict_name(field):
+    """ field name as a string of its own, like the dict layout built one for every prefixed attribute """
+    if field.prefix is None:
+        return field.name
+    return field.prefix + '_' + field.parent.name
+
+
+def as_dicts(all_standard_entities, all_standard_tables):
+    """ the resolved model with one attribute dict per field """
+    entities = {}
+    for name, entity in all_standard_entities.items():
+        attributes = []
+        for f in entity['attributes']:
+            attributes.append({"name": dict_name(f), "type": f.type, "description": f.description, "sample_value": f.sample_value})
+        entities[name] = dict(entity, attributes=attributes)
+    tables = {}
+    for name, table in all_standard_tables.items():
+        tables[name] = dict(table, attributes=[f.to_dict() for f in table['attributes']])
+    return entities, tables
+
+
+def measure(func):
+    """ (result, bytes still allocated by the result, peak bytes while running) """
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = func()
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current - before, peak - before
+
+
+def render(inputs, entities, tables, deepcopy):
+    entity_template = inputs.template('entity.md')
+    table_template = inputs.template('table.md')
+    for v in entities.values():
+        entity_template.render(entidad=copy.deepcopy(v) if deepcopy else v)
+    for v in tables.values():
+        table_template.render(table_metadata=copy.deepcopy(v) if deepcopy else v)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='ossem.benchmark', description='memory used by the resolved CDM model')
+    parser.add_argument('--root', help='OSSEM repository root (default: two levels above resources/scripts)')
+    args = parser.parse_args(argv)
+
+    inputs = Inputs(Project(args.root))
+    entities_loaded, tables_loaded = inputs.cdm_entities(), inputs.cdm_tables()
+    if not entities_loaded:
+        print('[!] No CDM entities found. Run git submodule update --init first.')
+        return 1
+    # Compile the templates before measuring
+    inputs.template('entity.md'), inputs.template('table.md')
+
+    def resolve():
+        pool = cdm.AttributePool()
+        entities = cdm.resolve_entities(entities_loaded, pool, quiet=True)
+        return entities, cdm.resolve_tables(tables_loaded, entities, pool, quiet=True)
+
+    compact, compact_size, _ = measure(resolve)
+    dicts, dict_size, _ = measure(lambda: as_dicts(*compact))
+    _, _, compact_peak = measure(lambda: render(inputs, *compact, deepcopy=False))
+    _, _, dict_peak = measure(lambda: render(inputs, *dicts, deepcopy=True))
+
+    fields = sum(len(e['attributes']) for e in compact[0].values()) + sum(len(t['attributes']) for t in compact[1].values())
+    print(f'[*] {len(compact[0])} entities, {len(compact[1])} tables, {fields} fields')
+    print(f'{"":<24}{"dicts":>12}{"compact":>12}{"ratio":>8}')
+    print(f'{"resolved model (KiB)":<24}{dict_size / 1024:>12.0f}{compact_size / 1024:>12.0f}{dict_size / max(compact_size, 1):>8.1f}')
+    print(f'{"render peak (KiB)":<24}{dict_peak / 1024:>12.0f}{compact_peak / 1024:>12.0f}{dict_peak / max(compact_peak, 1):>8.1f}')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,200 @@
+# Project: OSSEM
+# License: GPLv3
+
+import hashlib
+import json
+import os
+import sys
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from os import path
+
+from ossem import attack, cdm, dm, kql, logstash, model
+from ossem import inputs as i
+from ossem import project as p
+from ossem.inputs import Inputs
+
+STATE_FILE = '.ossem_build.json'
+# modules every stage runs through: project paths and input loading
+SHARED_CODE = [p, i]
+
+
+class Stage():
+    """ a build step: the files it reads, the stages it runs after and the function rendering its outputs
+
+    func(project, inputs) returns {output path relative to the project root: content}.
+    code lists the modules, besides the one defining func and SHARED_CODE, whose
+    code the output depends on; their files are part of the stage fingerprint.
+    changes(old_model, new_model), set for stages rendered from the resolved CDM, tells
+    watch mode what to re-render after an edit: a set of names passed to func as
+    names=, True for the whole stage or a falsy value when the stage is unaffected.
+    watch tells whether watch mode runs the stage when no stages are named.
+    """
+
+    def __init__(self, name, func, inputs, templates, deps=(), code=(), changes=None, watch=True, description=None):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.templates = list(templates)
+        self.deps = list(deps)
+        self.code = list(code)
+        self.changes = changes
+        self.watch = watch
+        self.description = description
+
+    def template_files(self, project):
+        return [project.template_path(t) for t in self.templates]
+
+    def input_files(self, project):
+        """ data files, templates and generator code the stage output depends on """
+        files = [f for pattern in self.inputs for f in project.glob(pattern)]
+        files += self.template_files(project)
+        modules = [sys.modules[self.func.__module__]] + SHARED_CODE + self.code
+        files += dict.fromkeys(m.__file__ for m in modules)
+        return files
+
+    def reads(self, project, filepath):
+        """ whether a file is one of the stage data files """
+        return any(project.matches(filepath, pattern) for pattern in self.inputs)
+
+    def has_inputs(self, project):
+        return any(project.glob(pattern) for pattern in self.inputs)
+
+    def fingerprint(self, project):
+        """ hash of the path, size and modification time of every input file """
+        digest = hashlib.sha1()
+        for f in self.input_files(project):
+            st = os.stat(f)
+            digest.update(f'{f}\0{st.st_size}\0{st.st_mtime_ns}\n'.encode())
+        return digest.hexdigest()
+
+    def modified_since(self, project, timestamp):
+        return any(path.getmtime(f) > timestamp for f in self.input_files(project))
+
+
+STAGES = [
+    Stage('cdm-entities', cdm.build_entities,
+        inputs=[p.CDM_ENTITIES], templates=['entity.md'], changes=cdm.changed_entities,
+        description='CDM entity pages (docs/cdm/entities)'),
+    Stage('cdm-tables', cdm.build_tables,
+        inputs=[p.CDM_ENTITIES, p.CDM_TABLES], templates=['table.md'], changes=cdm.changed_tables,
+        description='CDM table pages (docs/cdm/tables)'),
+    Stage('toc', cdm.build_toc,
+        inputs=[p.CDM_ENTITIES, p.CDM_TABLES], templates=['toc_template.json'],
+        deps=['cdm-entities', 'cdm-tables'], changes=cdm.changed_toc,
+        description='Jupyter Book TOC (docs/_toc.yml)'),
+    Stage('dm-relationships', dm.build_relationships,
+        inputs=[p.DM_RELATIONSHIPS], templates=['attack_ds_event_mappings.md', 'ossem_relationships_to_events.md'],
+        description='DM relationships to events pages (docs/dm)'),
+    Stage('attack-mappings', attack.build_mappings,
+        inputs=[p.ATTACK_EVENT_MAPPINGS], templates=['attack/ds_mapping_template.md'],
+        description='ATT&CK data sources mappings table'),
+    Stage('logstash', logstash.build_sysmon_config,
+        inputs=[p.SYSMON_EVENTS], templates=['logstash/sysmon.conf'],
+        description='Logstash Sysmon config (resources/parsers/logstash)'),
+    Stage('kql', kql.build_parser,
+        inputs=[p.SYSMON_SCHEMAS], templates=['kql/sysmon_parser.txt'],
+        description='Sysmon KQL parser for the newest schema (resources/parsers)'),
+    Stage('model-snapshot', model.build_snapshot,
+        inputs=[p.CDM_ENTITIES, p.CDM_TABLES, p.DD_EVENTS], templates=[], code=[cdm],
+        # a build artifact rather than a page being authored, kept off the watch latency path
+        watch=False,
+        description='resolved model snapshot for ossem.load_model() (resources/model)'),
+]
+
+
+def load_state(project):
+    try:
+        with open(project.path(STATE_FILE)) as state_file:
+            return json.load(state_file)
+    except (OSError, ValueError):
+        return {}
+
+def save_state(project, state):
+    with open(project.path(STATE_FILE), 'w') as state_file:
+        json.dump(state, state_file, indent=2, sort_keys=True)
+
+def write_outputs(project, outputs):
+    """ write rendered outputs; a None content removes the output """
+    for relpath, content in outputs.items():
+        if content is None:
+            if path.exists(project.path(relpath)):
+                os.remove(project.path(relpath))
+                print(f'[*] Removed {relpath}')
+        else:
+            project.write(relpath, content)
+
+def select(project, stages, only=None, since=None):
+    """ stages to consider for a build
+
+    only -- stage names; every other stage is left out
+    since -- unix timestamp; keep stages with inputs modified after it, plus the stages depending on them
+    """
+    selected = [s for s in stages if not only or s.name in only]
+    if since is not None:
+        names = {s.name for s in selected if s.modified_since(project, since)}
+        # Stages downstream of a changed stage are rebuilt too
+        for s in selected:
+            if any(d in names for d in s.deps):
+                names.add(s.name)
+        selected = [s for s in selected if s.name in names]
+    return selected
+
+def run(project, stages, force=False, jobs=None):
+    """ run stages concurrently in dependency order; returns a status per stage name
+
+    A stage is skipped when its inputs are unchanged since its last build and
+    every output it wrote then still exists, when none of its input files are
+    present, or when a stage it depends on failed. Dependencies on stages that
+    are not part of this run are treated as satisfied.
+    """
+    inputs = Inputs(project)
+    state = load_state(project)
+    state_lock = threading.Lock()
+    names = {s.name for s in stages}
+    status = {}
+
+    def execute(stage):
+        if not stage.has_inputs(project):
+            return 'skipped (no inputs)'
+        fingerprint = stage.fingerprint(project)
+        previous = state.get(stage.name, {})
+        if not force and previous.get('fingerprint') == fingerprint \
+                and all(path.exists(project.path(o)) for o in previous.get('outputs', [])):
+            return 'up to date'
+        outputs = stage.func(project, inputs)
+        write_outputs(project, outputs)
+        with state_lock:
+            state[stage.name] = {
+                'fingerprint': fingerprint,
+                'outputs': sorted(outputs)
+            }
+        return 'built'
+
+    pending = list(stages)
+    running = {}
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        while pending or running:
+            for stage in list(pending):
+                deps = [d for d in stage.deps if d in names]
+                if any(status.get(d) == 'failed' or status.get(d, '').startswith('skipped (dependency') for d in deps):
+                    status[stage.name] = 'skipped (dependency failed)'
+                    pending.remove(stage)
+                elif all(d in status for d in deps):
+                    running[executor.submit(execute, stage)] = stage
+                    pending.remove(stage)
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                stage = running.pop(future)
+                try:
+                    status[stage.name] = future.result()
+                except Exception:
+                    print(f'[!] Stage {stage.name} failed')
+                    traceback.print_exc()
+                    status[stage.name] = 'failed'
+
+    save_state(project, state)
+    return status
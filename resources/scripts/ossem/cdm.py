@@ -0,0 +1,319 @@
+# Project: OSSEM Common Data Model
+# Author: Roberto Rodriguez (@Cyb3rWard0g)
+# License: GPLv3
+
+import json
+import sys
+
+import yaml
+
+# ***********************************************
+# ******** Compact Attribute Representation *****
+# ***********************************************
+
+class Attribute():
+    """ an attribute as defined in an entity or custom table yaml file
+
+    Attributes are interned while resolving, so every field derived from the
+    same definition (one per prefix, extension and table) shares one object.
+    """
+    __slots__ = ('name', 'type', 'description', 'sample_value')
+
+    def __init__(self, name, type, description, sample_value):
+        self.name = name
+        self.type = type
+        self.description = description
+        self.sample_value = sample_value
+
+    def key(self):
+        return (self.name, self.type, self.description, self.sample_value)
+
+    def __eq__(self, other):
+        return isinstance(other, Attribute) and self.key() == other.key()
+
+    def __hash__(self):
+        try:
+            return hash(self.key())
+        except TypeError:
+            return hash(self.key()[:3])
+
+
+class Field():
+    """ a prefixed view of an attribute (or of another field), labeled with the entity owning it
+
+    The field name is the prefix joined to the name of the parent. It is built
+    on first use and kept, so hashing, comparing and rendering a field do not
+    rebuild it through the whole chain of parents.
+    Fields are read-only once resolved and tables reference the fields of
+    their entities instead of copying them. Templates read them like the
+    attribute dicts they replace (f['name'], f['type'], f['entity'], ...).
+    """
+    __slots__ = ('prefix', 'parent', 'attribute', 'entity', '_name')
+
+    def __init__(self, prefix, parent, entity):
+        self.prefix = prefix
+        self.parent = parent
+        self.attribute = parent if isinstance(parent, Attribute) else parent.attribute
+        self.entity = entity
+        self._name = None
+
+    @property
+    def name(self):
+        if self._name is None:
+            if self.prefix is None:
+                self._name = self.parent.name
+            else:
+                self._name = self.prefix + '_' + self.parent.name
+        return self._name
+
+    @property
+    def type(self):
+        return self.attribute.type
+
+    @property
+    def description(self):
+        return self.attribute.description
+
+    @property
+    def sample_value(self):
+        return self.attribute.sample_value
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __eq__(self, other):
+        """ same comparison as the attribute dicts: name, type, description, sample value and entity label """
+        return isinstance(other, Field) and self.name == other.name and self.entity == other.entity \
+            and self.attribute.key()[1:] == other.attribute.key()[1:]
+
+    def __hash__(self):
+        return hash((self.name, self.entity))
+
+    def __repr__(self):
+        return f'Field({self.name!r}, entity={self.entity!r})'
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "type": self.type,
+            "description": self.description,
+            "sample_value": self.sample_value,
+            "entity": self.entity
+        }
+
+
+class AttributePool():
+    """ interns attributes by content """
+
+    def __init__(self):
+        self.attributes = {}
+
+    def get(self, attribute):
+        """ shared Attribute for a yaml attribute dict """
+        interned = Attribute(
+            sys.intern(attribute['name']),
+            sys.intern(attribute['type']) if isinstance(attribute['type'], str) else attribute['type'],
+            attribute['description'],
+            attribute['sample_value']
+        )
+        return self.attributes.setdefault(interned, interned)
+
+# ***********************************************
+# ******** Processing OSSEM CDM Entities ********
+# ***********************************************
+
+def progress(quiet):
+    """ print for progress messages, or a function ignoring them """
+    return (lambda *args, **kwargs: None) if quiet else print
+
+def resolve_entities(entities_loaded, pool=None, quiet=False):
+    """ expand entity attributes for every prefix and entity extension (quiet: no progress messages) """
+    pool = pool or AttributePool()
+    echo = progress(quiet)
+    # Initializing Standard Entities Objects
+    all_standard_entities = {}
+    # Fields already in every entity, to skip duplicates without scanning the attribute lists
+    seen = {}
+
+    # ***** Process Initial Entity Attributes *****
+    for entity in entities_loaded:
+        echo(f"  [>] Processing {entity['name']}")
+        # Initialize entity object to add initial standard fields
+        entity_object = {
+            "name": entity['name'],
+            "prefix": entity['prefix'],
+            "id": entity['id'],
+            "extends_entities": entity['extends_entities'] if 'extends_entities' in entity.keys() else [],
+            "description": entity['description'],
+            "attributes": []
+        }
+        # Process entity attributes for each prefix assigned to an entity (Default snake_case format)
+        if entity['attributes']:
+            for prefix in entity['prefix']:
+                for attribute in entity['attributes']:
+                    # a prefix equal to the attribute name is not repeated (i.e. ip instead of ip_ip)
+                    field_prefix = None if prefix == attribute['name'] else sys.intern(prefix)
+                    entity_object['attributes'].append(Field(field_prefix, pool.get(attribute), entity['name']))
+        all_standard_entities[entity['name']] = entity_object
+        seen[entity['name']] = set(entity_object['attributes'])
+
+    def extend(name, prefix, parent):
+        field = Field(sys.intern(prefix), parent, name)
+        if field not in seen[name]:
+            seen[name].add(field)
+            all_standard_entities[name]['attributes'].append(field)
+        return field
+
+    # ***** Process Extended Entities *****
+    # Loop through the dictionary with the initial standard objects
+    echo("[+] Processing Entity Extensions..")
+    for k,v in all_standard_entities.items():
+        # If the entity extends other entities
+        if v['extends_entities']:
+            echo(f"  [>] Processing {k} extensions")
+            # Loop through entity names that the current entity extends
+            for entity in v['extends_entities']:
+                echo(f"  [>>] {entity}")
+                # Make sure you process every prefix assigned to the entity being extended
+                for prefix in all_standard_entities[entity]['prefix']:
+                    # Loop through every attribute of the current standardized entity
+                    for attribute in v['attributes']:
+                        # append extended standardized attributes to the extended entity
+                        field = extend(entity, prefix, attribute)
+                        # Loop through extended entities -> extending other entities
+                        for extentity in all_standard_entities[entity]['extends_entities']:
+                            # Loop through every prefix also if the extended -> extended entities
+                            for extprefix in all_standard_entities[extentity]['prefix']:
+                                extend(extentity, extprefix, field)
+    return all_standard_entities
+
+# ***********************************************
+# ******** Processing OSSEM CDM Tables **********
+# ***********************************************
+
+def resolve_tables(tables_loaded, all_standard_entities, pool=None, quiet=False):
+    """ collect the entity fields selected by every table
+
+    Fields of OSSEM entities are shared with the resolved entities, only
+    custom attributes get new fields. The loaded tables are never modified.
+    quiet turns off the progress messages.
+    """
+    pool = pool or AttributePool()
+    echo = progress(quiet)
+    # Initializing Standard Table Objects
+    all_standard_tables = {}
+
+    # Loop through every single table (Dictionary)
+    for table in tables_loaded:
+        echo(f"  [>] Processing Table {table['name']}")
+        table_object = {
+            "name": table['name'],
+            "id": table['id'],
+            "description": table['description'],
+            "attributes": []
+        }
+        # Looping through every entity defined for the table
+        for entity in table['entities']:
+            # If the entity value is just a name, then take all the attributes associated with the entity
+            if not isinstance(entity, dict):
+                echo(f"  [>>] Processing Entity {entity}")
+                table_object['attributes'].extend(all_standard_entities[entity]['attributes'])
+            # if the entity value is a dictionary, that means that the table is selecting specific attributes
+            # from entities or adding custom ones to it
+            else:
+                echo(f"  [>>] Processing Entity {entity['name']}")
+                # If the entity name is custom, then we are adding custom entities and attributes
+                # that do not exist in OSSEM
+                if entity['name'] == 'custom':
+                    for subentity in entity['entities']:
+                        for subprefix in subentity['prefix']:
+                            for eattribute in subentity['attributes']:
+                                # Entity label applied to attribute
+                                table_object['attributes'].append(Field(
+                                    sys.intern(subprefix), pool.get(eattribute), subentity['name']))
+                # Process the rest of the entities in dictionary format
+                else:
+                    # simply create field names by taking prefix and attribute
+                    field_names = [prefix + '_' + att for att in entity['attributes'] for prefix in entity['prefix']]
+                    for satt in all_standard_entities[entity['name']]['attributes']:
+                        satt_name = satt.name
+                        # check if field names match
+                        for field_name in field_names:
+                            if field_name == satt_name:
+                                table_object['attributes'].append(satt)
+        all_standard_tables[table['name']] = table_object
+    return all_standard_tables
+
+# ***********************************************
+# ******** Rendering OSSEM CDM Docs *************
+# ***********************************************
+
+def build_entities(project, inputs, names=None):
+    """ build stage: one markdown page per entity
+
+    names -- render only these entities; names missing from the model map to None (page removed)
+    """
+    print("[+] Processing entity files inside OSSEM-CDM/schemas/entities directory")
+    all_standard_entities, _ = inputs.cdm_model()
+    # ***** Creating Entity Files (snake_case) *****
+    entity_template = inputs.template('entity.md')
+    outputs = {}
+    for name in (all_standard_entities if names is None else names):
+        v = all_standard_entities.get(name)
+        entity_md = entity_template.render(entidad=v) if v else None
+        outputs[f"docs/cdm/entities/{name}.md"] = entity_md
+    return outputs
+
+def build_tables(project, inputs, names=None):
+    """ build stage: one markdown page per table
+
+    names -- render only these tables; names missing from the model map to None (page removed)
+    """
+    print("[+] Processing table files inside OSSEM-CDM/schemas/tables directory")
+    _, all_standard_tables = inputs.cdm_model()
+    # ***** Creating Table Files (snake_case) *****
+    table_template = inputs.template('table.md')
+    outputs = {}
+    for name in (all_standard_tables if names is None else names):
+        v = all_standard_tables.get(name)
+        table_md = table_template.render(table_metadata=v) if v else None
+        outputs[f"docs/cdm/tables/{name}.md"] = table_md
+    return outputs
+
+def changed(old, new):
+    """ names whose resolved entity or table differs between two resolved dicts (added and removed included) """
+    return {name for name in set(old) | set(new) if old.get(name) != new.get(name)}
+
+def changed_entities(old_model, new_model):
+    return changed(old_model[0], new_model[0])
+
+def changed_tables(old_model, new_model):
+    return changed(old_model[1], new_model[1])
+
+def changed_toc(old_model, new_model):
+    """ the TOC only lists pages, so it changes when entities or tables are added or removed """
+    return set(old_model[0]) != set(new_model[0]) or list(old_model[1]) != list(new_model[1])
+
+def render_toc(toc_template, all_standard_entities, all_standard_tables):
+    """ add entity and table pages to the Jupyter Book TOC template """
+    for d in toc_template:
+        if 'part' in d and d['part'] == 'Common Data Model':
+            # ******* Process Entities *******
+            for k,v in sorted(all_standard_entities.items()):
+                d['chapters'][2]['sections'].append({"file" : f"cdm/entities/{v['name']}"})
+            # ******* Process Tables *******
+            for k,v in all_standard_tables.items():
+                d['chapters'][3]['sections'].append({"file" : f"cdm/tables/{v['name']}"})
+    return yaml.dump(toc_template, sort_keys=False)
+
+def build_toc(project, inputs):
+    """ build stage: Jupyter Book TOC file """
+    print("[+] Updating Jupyter Book TOC file..")
+    all_standard_entities, all_standard_tables = inputs.cdm_model()
+    with open(project.template_path('toc_template.json')) as json_file:
+        toc_template = json.load(json_file)
+    toc = render_toc(toc_template, all_standard_entities, all_standard_tables)
+    return {'docs/_toc.yml': toc}
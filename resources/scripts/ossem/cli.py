@@ -0,0 +1,81 @@
+# Project: OSSEM
+# License: GPLv3
+
+import argparse
+from datetime import datetime
+
+from ossem import build
+from ossem.project import Project
+from ossem.watch import Watcher
+
+def parse_since(value):
+    """ ISO 8601 date or date and time -> unix timestamp """
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'invalid date: {value} (expected i.e. 2021-05-01 or 2021-05-01T10:00)')
+
+def positive_int(value):
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f'invalid number: {value} (expected a positive integer)')
+    return number
+
+def build_command(args):
+    stage_names = [s.name for s in build.STAGES]
+    if args.list:
+        for stage in build.STAGES:
+            deps = ' (after {})'.format(', '.join(stage.deps)) if stage.deps else ''
+            print(f'{stage.name:<18} {stage.description}{deps}')
+        return 0
+    unknown = [name for name in args.only or [] if name not in stage_names]
+    if unknown:
+        print('[!] Unknown stage(s): {}. Available: {}'.format(', '.join(unknown), ', '.join(stage_names)))
+        return 2
+
+    project = Project(args.root)
+    stages = build.select(project, build.STAGES, only=args.only, since=args.since)
+    if not stages:
+        print('[*] Nothing to build')
+        return 0
+    print('[*] Building {}'.format(', '.join(s.name for s in stages)))
+    status = build.run(project, stages, force=args.force, jobs=args.jobs)
+
+    print('[*] Build summary')
+    for stage in stages:
+        print(f'  [>] {stage.name:<18} {status[stage.name]}')
+    return 1 if 'failed' in status.values() else 0
+
+def watch_command(args):
+    unknown = [name for name in args.only or [] if name not in [s.name for s in build.STAGES]]
+    if unknown:
+        print('[!] Unknown stage(s): {}'.format(', '.join(unknown)))
+        return 2
+    stages = [s for s in build.STAGES if s.name in args.only] if args.only else [s for s in build.STAGES if s.watch]
+    Watcher(Project(args.root), stages).run()
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='ossem', description='OSSEM build tooling')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    build_parser = subparsers.add_parser('build', help='generate docs and parsers from the OSSEM yaml sources')
+    build_parser.add_argument('--root', help='OSSEM repository root (default: two levels above resources/scripts)')
+    build_parser.add_argument('--only', nargs='+', metavar='STAGE', help='run only these stages')
+    build_parser.add_argument('--since', type=parse_since, metavar='DATE',
+        help='run only stages with inputs modified after DATE, and the stages depending on them')
+    build_parser.add_argument('-f', '--force', action='store_true', help='rebuild stages even if they are up to date')
+    build_parser.add_argument('-j', '--jobs', type=positive_int, help='maximum number of stages running at once')
+    build_parser.add_argument('--list', action='store_true', help='list the build stages and exit')
+    build_parser.set_defaults(func=build_command)
+
+    watch_parser = subparsers.add_parser('watch', help='regenerate outputs as their yaml sources and templates change')
+    watch_parser.add_argument('--root', help='OSSEM repository root (default: two levels above resources/scripts)')
+    watch_parser.add_argument('--only', nargs='+', metavar='STAGE', help='watch only these stages (default: every stage but model-snapshot)')
+    watch_parser.set_defaults(func=watch_command)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
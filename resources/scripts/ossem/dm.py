@@ -0,0 +1,26 @@
+# Project: OSSEM Detection Model
+# Author: Jose Rodriguez (@Cyb3rPandaH)
+# License: GNU General Public License v3 (GPLv3)
+
+def build_relationships(project, inputs):
+    """ build stage: ATT&CK and OSSEM relationships to events pages """
+    # ******** Process Relationships yaml Files ****************
+    # Aggregating relationships yaml files (all relationships and ATT&CK)
+    print("[+] Processing relationships yaml files inside OSSEM-DM/relationships directory")
+    all_relationships_files = inputs.dm_relationships()
+    attack_relationships_files = [r for r in all_relationships_files if r['attack'] != None]
+
+    # Creating ATT&CK data sources to event mappings readme file
+    print(f"[+] Creating ATT&CK data sources to event mappings readme file..")
+    data_sources_event_mappings_template = inputs.template('attack_ds_event_mappings.md')
+    data_sources_event_mappings_markdown = data_sources_event_mappings_template.render(ds_event_mappings=attack_relationships_files)
+
+    # Creating OSSEM relationships to events readme file
+    print(f"[+] Creating OSSEM relationships to events readme file..")
+    ossem_event_mappings_template = inputs.template('ossem_relationships_to_events.md')
+    ossem_event_mappings_markdown = ossem_event_mappings_template.render(ds_event_mappings=all_relationships_files)
+
+    return {
+        'docs/dm/mitre_attack/attack_ds_events_mappings.md': data_sources_event_mappings_markdown,
+        'docs/dm/ossem_relationships_to_events.md': ossem_event_mappings_markdown
+    }
@@ -0,0 +1,116 @@
+# Project: OSSEM
+# License: GPLv3
+
+import threading
+from os import path
+
+import yaml
+from jinja2 import Environment, FileSystemLoader
+
+from ossem import project as p
+
+
+def load_yaml_files(files):
+    """ parse every yaml file in a list """
+    return [yaml.safe_load(open(yf).read()) for yf in files]
+
+
+def sysmon_event_number(filepath):
+    """ event number of a data dictionary file named event-<number>.yml """
+    return int(path.basename(filepath).split(".")[0].split('event-')[1])
+
+
+class Inputs():
+    """ inputs shared by every build stage
+
+    Each input is loaded once, on first use, and then served from memory.
+    Loading is guarded per input so concurrent stages asking for the same
+    input wait for a single load instead of parsing the files twice.
+    Parsed yaml files are also kept per file, so after invalidate() only the
+    files that changed are parsed again. Stages must treat the returned
+    objects as read-only. quiet turns off the progress messages printed while
+    resolving the CDM model.
+    """
+
+    # yaml inputs and the files they are loaded from
+    SOURCES = {
+        'cdm_entities': p.CDM_ENTITIES,
+        'cdm_tables': p.CDM_TABLES,
+        'dm_relationships': p.DM_RELATIONSHIPS,
+        'attack_event_mappings': p.ATTACK_EVENT_MAPPINGS,
+        'sysmon_events': p.SYSMON_EVENTS,
+        'dd_events': p.DD_EVENTS
+    }
+    # inputs computed from other inputs
+    DERIVED = {
+        'cdm_model': ['cdm_entities', 'cdm_tables']
+    }
+
+    def __init__(self, project, quiet=False):
+        self.project = project
+        self.quiet = quiet
+        # auto_reload (the jinja default) recompiles a template only when its file changes
+        self.env = Environment(loader=FileSystemLoader(project.templates_dir))
+        self._cache = {}
+        self._files = {}
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def _load(self, key, loader):
+        with self._guard:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            if key not in self._cache:
+                self._cache[key] = loader()
+            return self._cache[key]
+
+    def _load_yaml(self, key, sort_key=None):
+        def load():
+            files = sorted(self.project.glob(self.SOURCES[key]), key=sort_key)
+            for yf in files:
+                if yf not in self._files:
+                    self._files[yf] = load_yaml_files([yf])[0]
+            return [self._files[yf] for yf in files]
+        return self._load(key, load)
+
+    def invalidate(self, filepath):
+        """ forget a changed file and every input built from it; returns the invalidated input names """
+        self._files.pop(filepath, None)
+        keys = {key for key, pattern in self.SOURCES.items() if self.project.matches(filepath, pattern)}
+        keys |= {key for key, sources in self.DERIVED.items() if keys.intersection(sources)}
+        for key in keys:
+            self._cache.pop(key, None)
+        return keys
+
+    def template(self, name):
+        """ compiled jinja template (jinja caches compiled templates per environment) """
+        return self.env.get_template(name)
+
+    def cdm_entities(self):
+        return self._load_yaml('cdm_entities')
+
+    def cdm_tables(self):
+        return self._load_yaml('cdm_tables')
+
+    def cdm_model(self):
+        """ resolved CDM entities and tables """
+        from ossem import cdm
+        def resolve():
+            pool = cdm.AttributePool()
+            entities = cdm.resolve_entities(self.cdm_entities(), pool, self.quiet)
+            tables = cdm.resolve_tables(self.cdm_tables(), entities, pool, self.quiet)
+            return entities, tables
+        return self._load('cdm_model', resolve)
+
+    def dm_relationships(self):
+        return self._load_yaml('dm_relationships')
+
+    def attack_event_mappings(self):
+        return self._load_yaml('attack_event_mappings')
+
+    def sysmon_events(self):
+        return self._load_yaml('sysmon_events', sort_key=sysmon_event_number)
+
+    def dd_events(self):
+        """ OSSEM-DD data dictionary events """
+        return self._load_yaml('dd_events')
@@ -0,0 +1,91 @@
+# Authors: Roberto Rodriguez (@Cyb3rWard0g) Ashwin Patil (@ashwinpatil)
+# Community: Open Threat Research (@OTR_Community)
+# License: GPL-3.0
+
+import logging
+import re
+from datetime import date
+from os import path
+
+import untangle
+
+from ossem import project as p
+
+log = logging.getLogger('Sysmon Parser')
+
+def schema_version(schema_file):
+    """ sysmon version from a schema file name, i.e. sysmonv13.10_4.60.xml -> 13.10 """
+    match = re.match(r'sysmonv([0-9.]+)_', path.basename(schema_file))
+    return match.group(1) if match else None
+
+def latest_schema(project):
+    """ newest sysmon schema file shipped under resources/schemas """
+    schemas = [s for s in project.glob(p.SYSMON_SCHEMAS) if schema_version(s)]
+    if not schemas:
+        return None
+    return max(schemas, key=lambda s: [int(n) for n in schema_version(s).split('.')])
+
+def parse_schema(sysmon_schema):
+    """ parse a sysmon XML schema (file path or XML string) into events and unique field names """
+    # ******** Processing Sysmon Schema ****************
+    log.info('Parsing Sysmon schema file')
+    obj = untangle.parse(sysmon_schema)
+
+    # Sysmon Manifest
+    log.debug("Getting Sysmon Manifest")
+    sysmon_manifest = obj.manifest
+    # Events Metadata
+    log.debug("Getting Sysmon Events Data")
+    eventlist = obj.manifest.events.event
+
+    # Initializing list
+    all_sysmon = []
+
+    # ******** Iterating over Sysmon Events ****************
+    log.info('Iterating over Sysmon events')
+    for item in eventlist:
+        log.info('Processing Event: {} - {}'.format(item['name'],item['value']))
+        sysmon_event = dict()
+        sysmon_event['name'] = item['name']
+        sysmon_event['id'] = item['value']
+        sysmon_event['events'] = []
+
+        fieldlist = item.data
+        count = 0
+        log.info('Iterating over event field names')
+        for field in fieldlist:
+            log.debug('Field Name: {}'.format(field['name']))
+            field_name = dict()
+            field_name['name'] = field['name']
+            field_name['index'] = count
+            sysmon_event['events'].append(field_name)
+            count += 1
+        all_sysmon.append(sysmon_event)
+
+    # ******** Unique List of Events ****************
+    log.info('Creating a list of all unique field names')
+    unique_fields = ['TimeGenerated','Source','Computer','UserName','EventID']
+    for sysevent in all_sysmon:
+        for field in sysevent['events']:
+            if field['name'] not in unique_fields:
+                unique_fields.append(field['name'])
+
+    return sysmon_manifest, all_sysmon, unique_fields
+
+def render_parser(kql_parser_template, sysmon_schema, sysmon_version):
+    """ render the KQL parser (function) for a sysmon schema """
+    sysmon_manifest, all_sysmon, unique_fields = parse_schema(sysmon_schema)
+    # ******** Processing Sysmon Events and Jinja template ****************
+    log.info('Processing Jinja template')
+    return kql_parser_template.render(sysmon=all_sysmon, uniquesysmon=unique_fields, today=date.today(), sysmonversion=sysmon_version, schemaversion=sysmon_manifest['schemaversion'], binaryversion=sysmon_manifest['binaryversion'])
+
+def build_parser(project, inputs):
+    """ build stage: KQL parser for the newest sysmon schema """
+    schema_file = latest_schema(project)
+    if schema_file is None:
+        print("[!] No versioned sysmon schema (sysmonv<version>_<schema>.xml) found, skipping KQL parser")
+        return {}
+    sysmon_version = schema_version(schema_file)
+    print(f"[+] Creating Sysmon KQL parser from {project.relpath(schema_file)}")
+    parser = render_parser(inputs.template('kql/sysmon_parser.txt'), schema_file, sysmon_version)
+    return {f'resources/parsers/SysmonKQLParserV{sysmon_version}.txt': parser}
@@ -0,0 +1,12 @@
+# Author: Roberto Rodriguez (@Cyb3rWard0g)
+# License: GPLv3
+
+def build_sysmon_config(project, inputs):
+    """ build stage: Logstash filter config for Sysmon events """
+    print("[+] Processing files inside source/data_dictionaries/windows/sysmon/events directory")
+    # ******** Creating Logstash Config ********
+    print("[+] Creating Logstash config..")
+    yaml_template = inputs.template('logstash/sysmon.conf')
+    config = yaml_template.render(renderyaml=inputs.sysmon_events())
+    print("  [>] Writing config report to sysmon.conf")
+    return {'resources/parsers/logstash/sysmon.conf': config}
@@ -0,0 +1,346 @@
+# Project: OSSEM
+# License: GPLv3
+
+""" Resolved OSSEM model: CDM entities and tables, and OSSEM-DD events
+
+The build writes the resolved model to a binary snapshot
+(resources/model/ossem_model.bin, stage model-snapshot). Opening it maps the
+file into memory and decodes nothing but its header; strings, fields and
+metadata are decoded when a record is asked for.
+
+    from ossem import load_model, get_entity, get_table, fields_for_event
+
+    get_entity('process')['attributes']
+    get_table('network_session')['attributes']
+    fields_for_event('4688', log_source='Microsoft-Windows-Security-Auditing')
+
+Entities and tables come back in the layout of the resolved CDM, with
+attributes as plain dicts (name, type, description, sample_value and, for
+tables, entity). Every call decodes a fresh copy, so callers may modify it.
+
+Snapshot layout (little endian), version 1:
+
+    header      magic, version, then (offset, count) of every section below
+    strings     offsets (count + 1 uint32) into a utf-8 blob
+    attributes  (type, description, sample_value) value ids, shared by fields
+    fields      (name, attribute, entity) rows of entity and table attributes
+    event_fields (standard_name, name, type, description, sample_value) value ids
+    entities, tables, events
+                directories of (name, metadata JSON, first row, row count)
+
+Value ids are string ids; ids with the JSON bit set point to the JSON text of
+a value that is not a string (numbers, lists, null).
+"""
+
+import json
+import mmap
+import os
+import struct
+from os import path
+
+from ossem import project as p
+
+MAGIC = b'OSSEMSNP'
+VERSION = 1
+SECTIONS = ('string_offsets', 'strings', 'attributes', 'fields', 'event_fields', 'entities', 'tables', 'events')
+HEADER = struct.Struct('<8sI' + 'QI' * len(SECTIONS))
+UINT = struct.Struct('<I')
+ATTRIBUTE = struct.Struct('<III')
+FIELD = struct.Struct('<III')
+EVENT_FIELD = struct.Struct('<IIIII')
+DIRECTORY = struct.Struct('<IIII')
+JSON_VALUE = 0x80000000
+# bytes per counted item of every section ('strings' counts blob bytes)
+ROW_SIZES = {
+    'string_offsets': UINT.size,
+    'strings': 1,
+    'attributes': ATTRIBUTE.size,
+    'fields': FIELD.size,
+    'event_fields': EVENT_FIELD.size,
+    'entities': DIRECTORY.size,
+    'tables': DIRECTORY.size,
+    'events': DIRECTORY.size
+}
+
+EVENT_FIELD_KEYS = ('standard_name', 'name', 'type', 'description', 'sample_value')
+
+
+class SnapshotError(Exception):
+    """ the snapshot is missing, corrupt or written by an unsupported version """
+
+
+# ***********************************************
+# ******** Writing Snapshots ********************
+# ***********************************************
+
+class SnapshotWriter():
+    """ encodes a resolved model into the snapshot format """
+
+    def __init__(self):
+        self.strings = {}
+        self.attributes = {}
+        self.sections = {name: bytearray() for name in SECTIONS}
+
+    def string(self, text):
+        if text not in self.strings:
+            self.strings[text] = len(self.strings)
+        return self.strings[text]
+
+    def value(self, value):
+        if isinstance(value, str):
+            return self.string(value)
+        return self.string(json.dumps(value, default=str)) | JSON_VALUE
+
+    def attribute(self, field):
+        row = (self.value(field['type']), self.value(field['description']), self.value(field['sample_value']))
+        if row not in self.attributes:
+            self.attributes[row] = len(self.attributes)
+            self.sections['attributes'] += ATTRIBUTE.pack(*row)
+        return self.attributes[row]
+
+    def record(self, directory, name, metadata, rows, rows_section):
+        first = len(self.sections[rows_section]) // self.row_size(rows_section)
+        for row in rows:
+            self.sections[rows_section] += row
+        self.sections[directory] += DIRECTORY.pack(self.string(name), self.value(metadata), first, len(rows))
+
+    @staticmethod
+    def row_size(section):
+        return EVENT_FIELD.size if section == 'event_fields' else FIELD.size
+
+    def fields(self, attributes, entity=None):
+        return [FIELD.pack(self.string(f['name']), self.attribute(f), self.string(f['entity'] if entity is None else entity))
+                for f in attributes]
+
+    def add_entity(self, entity):
+        metadata = {k: entity[k] for k in ('id', 'prefix', 'extends_entities', 'description')}
+        self.record('entities', entity['name'], metadata, self.fields(entity['attributes'], entity['name']), 'fields')
+
+    def add_table(self, table):
+        metadata = {k: table[k] for k in ('id', 'description')}
+        self.record('tables', table['name'], metadata, self.fields(table['attributes']), 'fields')
+
+    def add_event(self, event):
+        metadata = {k: v for k, v in event.items() if k != 'event_fields'}
+        rows = [EVENT_FIELD.pack(*(self.value(f.get(k)) for k in EVENT_FIELD_KEYS)) for f in event['event_fields'] or []]
+        self.record('events', str(event['event_code']), metadata, rows, 'event_fields')
+
+    def getvalue(self):
+        blob = bytearray()
+        offsets = bytearray(UINT.pack(0))
+        for text in self.strings:
+            blob += text.encode('utf-8')
+            offsets += UINT.pack(len(blob))
+        self.sections['string_offsets'] = offsets
+        self.sections['strings'] = blob
+        counts = {
+            'string_offsets': len(self.strings),
+            'strings': len(blob),
+            'attributes': len(self.attributes),
+            'fields': len(self.sections['fields']) // FIELD.size,
+            'event_fields': len(self.sections['event_fields']) // EVENT_FIELD.size,
+        }
+        header = [MAGIC, VERSION]
+        body = bytearray()
+        for name in SECTIONS:
+            header += [HEADER.size + len(body), counts.get(name, len(self.sections[name]) // DIRECTORY.size)]
+            body += self.sections[name]
+        return HEADER.pack(*header) + bytes(body)
+
+
+def write_snapshot(all_standard_entities, all_standard_tables, events=()):
+    """ snapshot bytes for resolved entities, resolved tables and data dictionary events """
+    writer = SnapshotWriter()
+    for entity in all_standard_entities.values():
+        writer.add_entity(entity)
+    for table in all_standard_tables.values():
+        writer.add_table(table)
+    for event in events:
+        if isinstance(event, dict) and 'event_code' in event and 'event_fields' in event:
+            writer.add_event(event)
+    return writer.getvalue()
+
+
+def build_snapshot(project, inputs):
+    """ build stage: binary snapshot of the resolved model """
+    print("[+] Writing resolved model snapshot..")
+    all_standard_entities, all_standard_tables = inputs.cdm_model() if inputs.cdm_entities() else ({}, {})
+    snapshot = write_snapshot(all_standard_entities, all_standard_tables, inputs.dd_events())
+    return {p.MODEL_SNAPSHOT: snapshot}
+
+
+# ***********************************************
+# ******** Reading Snapshots ********************
+# ***********************************************
+
+class Model():
+    """ a memory-mapped model snapshot """
+
+    def __init__(self, filepath):
+        self.path = filepath
+        try:
+            with open(filepath, 'rb') as snapshot:
+                self.stat = os.fstat(snapshot.fileno())
+                self.buffer = mmap.mmap(snapshot.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as e:
+            raise SnapshotError(f'cannot open model snapshot {filepath}: {e}') from e
+        if len(self.buffer) < HEADER.size:
+            raise SnapshotError(f'{filepath} is not an OSSEM model snapshot')
+        header = HEADER.unpack_from(self.buffer, 0)
+        if header[0] != MAGIC:
+            raise SnapshotError(f'{filepath} is not an OSSEM model snapshot')
+        if header[1] != VERSION:
+            raise SnapshotError(f'{filepath} is a version {header[1]} snapshot, expected version {VERSION}. '
+                                'Rebuild it with python3 -m ossem build --only model-snapshot')
+        self.sections = dict(zip(SECTIONS, zip(header[2::2], header[3::2])))
+        for name, (offset, count) in self.sections.items():
+            # string offsets hold count + 1 entries
+            end = offset + (count + (name == 'string_offsets')) * ROW_SIZES[name]
+            if offset < HEADER.size or end > len(self.buffer):
+                raise SnapshotError(f'{filepath} is truncated or corrupt: section {name} ends past the end of the file')
+        self._strings = {}
+        self._directories = {}
+        self._events = None
+
+    def close(self):
+        self.buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def string(self, index):
+        if index not in self._strings:
+            offsets = self.sections['string_offsets'][0] + index * UINT.size
+            start, end = struct.unpack_from('<II', self.buffer, offsets)
+            blob = self.sections['strings'][0]
+            self._strings[index] = self.buffer[blob + start:blob + end].decode('utf-8')
+        return self._strings[index]
+
+    def value(self, value_id):
+        if value_id & JSON_VALUE:
+            return json.loads(self.string(value_id & ~JSON_VALUE))
+        return self.string(value_id)
+
+    def row(self, section, layout, index):
+        return layout.unpack_from(self.buffer, self.sections[section][0] + index * layout.size)
+
+    def directory(self, name):
+        """ {record name: directory index}, decoded on first use """
+        if name not in self._directories:
+            self._directories[name] = {
+                self.string(self.row(name, DIRECTORY, i)[0]): i for i in range(self.sections[name][1])
+            }
+        return self._directories[name]
+
+    def fields(self, first, count, entity=True):
+        fields = []
+        for i in range(first, first + count):
+            name, attribute, entity_name = self.row('fields', FIELD, i)
+            type_id, description_id, sample_id = self.row('attributes', ATTRIBUTE, attribute)
+            field = {
+                "name": self.string(name),
+                "type": self.value(type_id),
+                "description": self.value(description_id),
+                "sample_value": self.value(sample_id)
+            }
+            if entity:
+                field["entity"] = self.string(entity_name)
+            fields.append(field)
+        return fields
+
+    def entities(self):
+        return list(self.directory('entities'))
+
+    def tables(self):
+        return list(self.directory('tables'))
+
+    def entity(self, name):
+        """ resolved entity by name; raises KeyError """
+        _, metadata, first, count = self.row('entities', DIRECTORY, self.directory('entities')[name])
+        return dict({"name": name}, **self.value(metadata), attributes=self.fields(first, count, entity=False))
+
+    def table(self, name):
+        """ resolved table by name, every attribute labeled with its entity; raises KeyError """
+        _, metadata, first, count = self.row('tables', DIRECTORY, self.directory('tables')[name])
+        return dict({"name": name}, **self.value(metadata), attributes=self.fields(first, count))
+
+    def find_events(self, event_code=None, log_source=None, platform=None, event_version=None):
+        """ [(directory index, event metadata)] of the events matching the filters """
+        events = []
+        for i in range(self.sections['events'][1]):
+            name, metadata, _, _ = self.row('events', DIRECTORY, i)
+            if event_code is not None and self.string(name) != str(event_code):
+                continue
+            event = self.value(metadata)
+            if log_source is not None and event.get('log_source') != log_source:
+                continue
+            if platform is not None and event.get('platform') != platform:
+                continue
+            if event_version is not None and str(event.get('event_version')) != str(event_version):
+                continue
+            events.append((i, event))
+        return events
+
+    def events(self, event_code=None, log_source=None, platform=None, event_version=None):
+        """ data dictionary events (without their fields), optionally filtered """
+        return [event for _, event in self.find_events(event_code, log_source, platform, event_version)]
+
+    def event_fields(self, event_code, log_source=None, platform=None, event_version=None):
+        """ fields of a data dictionary event
+
+        Event codes are not unique across log sources (i.e. sysmon and security
+        events) nor across versions of an event, so a code matching several
+        events needs log_source, platform or event_version.
+        Raises KeyError when no event matches and ValueError when several do.
+        """
+        events = self.find_events(event_code, log_source, platform, event_version)
+        if not events:
+            raise KeyError(event_code)
+        if len(events) > 1:
+            matches = '; '.join(sorted(
+                'platform {}, log_source {}, event_version {}'.format(e.get('platform'), e.get('log_source'), e.get('event_version'))
+                for _, e in events))
+            raise ValueError(f'event {event_code} matches several events ({matches}), '
+                             'pass the platform, log_source or event_version of one of them')
+        _, _, first, count = self.row('events', DIRECTORY, events[0][0])
+        fields = []
+        for i in range(first, first + count):
+            values = self.row('event_fields', EVENT_FIELD, i)
+            fields.append({k: self.value(v) for k, v in zip(EVENT_FIELD_KEYS, values)})
+        return fields
+
+
+_models = {}
+
+def load_model(filepath=None):
+    """ open a model snapshot (default: the one written by the build in this repository)
+
+    Models are cached per path and reopened when the snapshot file is replaced.
+    """
+    filepath = path.abspath(filepath or p.Project().path(p.MODEL_SNAPSHOT))
+    model = _models.get(filepath)
+    if model is not None:
+        try:
+            st = os.stat(filepath)
+        except OSError:
+            st = None
+        if st is None or (st.st_ino, st.st_mtime_ns, st.st_size) != (model.stat.st_ino, model.stat.st_mtime_ns, model.stat.st_size):
+            model = None
+    if model is None:
+        model = _models[filepath] = Model(filepath)
+    return model
+
+def get_entity(name):
+    """ resolved CDM entity from the default snapshot """
+    return load_model().entity(name)
+
+def get_table(name):
+    """ resolved CDM table from the default snapshot """
+    return load_model().table(name)
+
+def fields_for_event(event_code, log_source=None, platform=None, event_version=None):
+    """ fields of a data dictionary event from the default snapshot """
+    return load_model().event_fields(event_code, log_source, platform, event_version)
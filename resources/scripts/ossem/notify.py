@@ -0,0 +1,125 @@
+# Project: OSSEM
+# License: GPLv3
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from os import path
+
+# inotify event masks (linux/inotify.h)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct('iIII')
+
+
+class InotifyMonitor():
+    """ reports files changed under a set of directory trees, using Linux inotify
+
+    Files count as changed once they are closed after writing, moved or
+    deleted, so editors saving through a temporary file report the final
+    file only. Directories created later are watched as they appear.
+    """
+
+    def __init__(self, dirs):
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self.fd = self.libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        self.watches = {}
+        for d in dirs:
+            self.add_tree(d)
+
+    def add_tree(self, root):
+        for dirpath, dirnames, _ in os.walk(root):
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(dirpath), WATCH_MASK)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), f'inotify_add_watch failed for {dirpath}')
+            self.watches[wd] = dirpath
+
+    def changes(self, timeout=None):
+        """ paths changed since the last call; waits up to timeout seconds for the first change """
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        changed = set()
+        data = os.read(self.fd, 64 * 1024)
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b'\0')
+            offset += EVENT_HEADER.size + length
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+            if wd not in self.watches or not name:
+                continue
+            filepath = path.join(self.watches[wd], os.fsdecode(name))
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    self.add_tree(filepath)
+                    changed.update(f for f in walk_files(filepath))
+            elif not mask & IN_CREATE:
+                # a created file is reported again when it is closed after writing
+                changed.add(filepath)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+class PollingMonitor():
+    """ reports files changed under a set of directory trees by comparing modification times """
+
+    def __init__(self, dirs, interval=0.25):
+        self.dirs = list(dirs)
+        self.interval = interval
+        self.mtimes = self.scan()
+
+    def scan(self):
+        mtimes = {}
+        for d in self.dirs:
+            for f in walk_files(d):
+                try:
+                    mtimes[f] = os.stat(f).st_mtime_ns
+                except OSError:
+                    pass
+        return mtimes
+
+    def changes(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            mtimes = self.scan()
+            changed = {f for f in set(mtimes) | set(self.mtimes) if mtimes.get(f) != self.mtimes.get(f)}
+            self.mtimes = mtimes
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+            time.sleep(self.interval)
+
+    def close(self):
+        pass
+
+
+def walk_files(root):
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            yield path.join(dirpath, name)
+
+
+def monitor(dirs):
+    """ inotify monitor, or a polling one where inotify is not available """
+    try:
+        return InotifyMonitor(dirs)
+    except (OSError, AttributeError, TypeError):
+        print('[!] inotify is not available, polling for changes instead')
+        return PollingMonitor(dirs)
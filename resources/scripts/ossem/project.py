@@ -0,0 +1,89 @@
+# Project: OSSEM
+# License: GPLv3
+
+import fnmatch
+import glob
+import os
+from os import path
+
+# Default locations, resolved from this file so nothing depends on the working directory
+SCRIPTS_DIR = path.dirname(path.dirname(path.abspath(__file__)))
+TEMPLATES_DIR = path.join(SCRIPTS_DIR, 'templates')
+ROOT_DIR = path.abspath(path.join(SCRIPTS_DIR, '..', '..'))
+
+# Input globs (relative to the project root)
+CDM_ENTITIES = 'OSSEM-CDM/schemas/entities/*.yml'
+CDM_TABLES = 'OSSEM-CDM/schemas/tables/*.yml'
+DM_RELATIONSHIPS = 'OSSEM-DM/relationships/[!_]*.yml'
+ATTACK_EVENT_MAPPINGS = 'attack_data_sources/event-mappings/[!all_data_sources]*.yml'
+SYSMON_EVENTS = 'source/data_dictionaries/windows/sysmon/events/*.yml'
+SYSMON_SCHEMAS = 'resources/schemas/sysmonv*.xml'
+DD_EVENTS = 'OSSEM-DD/**/events/*.yml'
+
+# Outputs read back by other tools
+MODEL_SNAPSHOT = 'resources/model/ossem_model.bin'
+
+
+def match_parts(parts, pattern_parts):
+    """ glob(recursive=True) matching of path components
+
+    ** matches zero or more directories, every other pattern component matches
+    exactly one path component, and hidden components only match patterns
+    starting with a dot.
+    """
+    if not pattern_parts:
+        return not parts
+    if pattern_parts[0] == '**':
+        for i in range(len(parts) + 1):
+            if match_parts(parts[i:], pattern_parts[1:]):
+                return True
+            if i < len(parts) and parts[i].startswith('.'):
+                return False
+        return False
+    if not parts or (parts[0].startswith('.') and not pattern_parts[0].startswith('.')):
+        return False
+    return fnmatch.fnmatchcase(parts[0], pattern_parts[0]) and match_parts(parts[1:], pattern_parts[1:])
+
+
+class Project():
+    """ locations of OSSEM inputs and generated outputs """
+
+    def __init__(self, root=None, templates_dir=None):
+        self.root = path.abspath(root or ROOT_DIR)
+        self.templates_dir = path.abspath(templates_dir or TEMPLATES_DIR)
+
+    def path(self, *parts):
+        """ absolute path of a file inside the project """
+        return path.join(self.root, *parts)
+
+    def relpath(self, filepath):
+        """ path of a file relative to the project root """
+        return path.relpath(filepath, self.root)
+
+    def glob(self, pattern):
+        """ sorted absolute paths matching a glob relative to the project root (** matches nested directories) """
+        return sorted(glob.glob(self.path(pattern), recursive=True))
+
+    def matches(self, filepath, pattern):
+        """ whether a file matches a glob relative to the project root, as glob() would find it
+
+        The file does not need to exist, so deleted files still match.
+        """
+        return match_parts(self.relpath(filepath).split(os.sep), pattern.split('/'))
+
+    def template_path(self, name):
+        return path.join(self.templates_dir, name)
+
+    def write(self, relpath, content):
+        """ write a generated file (text or bytes), creating its directory if needed
+
+        The file is replaced atomically, so readers (i.e. a memory-mapped model
+        snapshot) never see a partially written file.
+        """
+        filepath = self.path(relpath)
+        os.makedirs(path.dirname(filepath), exist_ok=True)
+        tmp_path = f'{filepath}.tmp{os.getpid()}'
+        with open(tmp_path, 'wb' if isinstance(content, bytes) else 'w') as output:
+            output.write(content)
+        os.replace(tmp_path, filepath)
+        return filepath
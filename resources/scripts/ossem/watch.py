@@ -0,0 +1,144 @@
+# Project: OSSEM
+# License: GPLv3
+
+import os
+import time
+import traceback
+from os import path
+
+from ossem import notify
+from ossem.inputs import Inputs
+
+# How long to wait for more events after the first one, so a save touching several files is handled once
+SETTLE_TIME = 0.05
+
+
+class Watcher():
+    """ regenerates outputs as their source files change
+
+    The parsed yaml files, the resolved CDM model and the compiled templates
+    stay in memory between edits. An edit re-parses only the changed files.
+    CDM stages then compare the new resolved model with the previous one and
+    re-render only the entities and tables whose resolved content changed;
+    other stages render again from the in-memory inputs. Only outputs whose
+    content differs from what was last written are written to disk.
+    """
+
+    def __init__(self, project, stages):
+        self.project = project
+        self.stages = list(stages)
+        self.inputs = Inputs(project, quiet=True)
+        self.model = None
+        self.rendered = {}
+
+    def watched_dirs(self):
+        """ directories holding stage inputs (the nearest existing one below the project root) and templates """
+        dirs = {self.project.templates_dir}
+        for stage in self.stages:
+            for pattern in stage.inputs:
+                d = self.project.path(path.dirname(pattern))
+                while not path.isdir(d) and path.dirname(d) != self.project.root:
+                    d = path.dirname(d)
+                if path.isdir(d):
+                    dirs.add(d)
+        # nested directories are covered by their parent's watch
+        return sorted(d for d in dirs if not any(d.startswith(o + os.sep) for o in dirs))
+
+    def write(self, outputs):
+        """ write outputs that changed since they were last written; returns their paths """
+        written = []
+        for relpath, content in outputs.items():
+            if relpath not in self.rendered and content is not None and path.exists(self.project.path(relpath)):
+                with open(self.project.path(relpath), 'rb' if isinstance(content, bytes) else 'r') as current:
+                    self.rendered[relpath] = current.read()
+            if self.rendered.get(relpath) == content:
+                continue
+            if content is None:
+                self.rendered.pop(relpath, None)
+                if path.exists(self.project.path(relpath)):
+                    os.remove(self.project.path(relpath))
+            else:
+                self.project.write(relpath, content)
+                self.rendered[relpath] = content
+            written.append(relpath)
+        return written
+
+    def render(self, stage, **kwargs):
+        try:
+            return self.write(stage.func(self.project, self.inputs, **kwargs))
+        except Exception:
+            print(f'[!] Stage {stage.name} failed')
+            traceback.print_exc()
+            return []
+
+    def start(self):
+        """ render every stage once, writing only outputs that differ from the files on disk """
+        written = []
+        for stage in self.stages:
+            if stage.has_inputs(self.project):
+                written += self.render(stage)
+        if any(stage.changes for stage in self.stages):
+            try:
+                self.model = self.inputs.cdm_model()
+            except Exception:
+                self.model = None
+        return written
+
+    def update(self, changed):
+        """ re-render what a set of changed files affects; returns the written outputs """
+        templates = {f for f in changed if f.startswith(self.project.templates_dir + os.sep)}
+        data = set(changed) - templates
+        invalidated = set()
+        for f in data:
+            invalidated |= self.inputs.invalidate(f)
+
+        # Resolve the new model once, so it is the baseline of the next edit even when every
+        # CDM stage renders fully (i.e. its template changed too)
+        old_model = self.model
+        if any(stage.changes for stage in self.stages) and ('cdm_model' in invalidated or self.model is None):
+            try:
+                self.model = self.inputs.cdm_model()
+            except Exception:
+                print('[!] Failed resolving the CDM model')
+                traceback.print_exc()
+                self.model = None
+
+        written = []
+        for stage in self.stages:
+            full = any(f in stage.template_files(self.project) for f in templates)
+            if not full and not any(stage.reads(self.project, f) for f in data):
+                continue
+            if stage.changes and not full and old_model is not None:
+                if self.model is None:
+                    continue
+                update = stage.changes(old_model, self.model)
+                if update is True:
+                    written += self.render(stage)
+                elif update:
+                    written += self.render(stage, names=update)
+            else:
+                written += self.render(stage)
+        return written
+
+    def run(self):
+        written = self.start()
+        print(f'[*] Initial build wrote {len(written)} file(s)')
+        monitor = notify.monitor(self.watched_dirs())
+        print('[*] Watching {} (Ctrl+C to stop)'.format(', '.join(self.project.relpath(d) for d in self.watched_dirs())))
+        try:
+            while True:
+                changed = monitor.changes()
+                started = time.monotonic()
+                more = monitor.changes(SETTLE_TIME)
+                while more:
+                    changed |= more
+                    more = monitor.changes(SETTLE_TIME)
+                written = self.update(changed)
+                elapsed = (time.monotonic() - started) * 1000
+                for relpath in written:
+                    print(f'  [>] Updated {relpath}')
+                print(f'[*] {len(changed)} change(s), {len(written)} file(s) updated in {elapsed:.0f} ms')
+        except KeyboardInterrupt:
+            pass
+        finally:
+            monitor.close()
@@ -5,13 +5,13 @@
 # License: GPL-3.0
 
 from jinja2 import Template
-import copy
 import argparse
-import untangle
-from datetime import date
 import urllib.request
 import os
+from os import path
 import logging
+from ossem import kql
+from ossem.project import TEMPLATES_DIR
 
 # ******** Setting up Argument Parsers ****************
 # Initial description
@@ -52,58 +52,10 @@ elif urllib.request.urlopen(schema_file):
 else:
     quit()
 
-# ******** Processing Sysmon Schema ****************
-# Parse Sysnon schema XML
-log.info('Parsing Sysmon schema file')
-obj = untangle.parse(sysmon_schema)
-
-# Sysmon Manifest
-log.debug("Getting Sysmon Manifest")
-sysmon_manifest = obj.manifest
-# Events Metadata
-log.debug("Getting Sysmon Events Data")
-eventlist = obj.manifest.events.event
-
-# Initializing list
-all_sysmon = []
-
-# ******** Iterating over Sysmon Events ****************
-log.info('Iterating over Sysmon events')
-for item in eventlist:
-    log.info('Processing Event: {} - {}'.format(item['name'],item['value']))
-    sysmon_event = dict()
-    sysmon_event['name'] = item['name']
-    sysmon_event['id'] = item['value']
-    sysmon_event['events'] = []
-
-    fieldlist = item.data
-    count = 0
-    log.info('Iterating over event field names')
-    for field in fieldlist:
-        log.debug('Field Name: {}'.format(field['name']))
-        field_name = dict()
-        field_name['name'] = field['name']
-        field_name['index'] = count
-        sysmon_event['events'].append(field_name)
-        count += 1
-    all_sysmon.append(sysmon_event)
-
-# ******** Unique List of Events ****************
-log.info('Creating a list of all unique field names')
-unique_fields = ['TimeGenerated','Source','Computer','UserName','EventID']
-for sysevent in all_sysmon:
-    for field in sysevent['events']:
-        if field['name'] not in unique_fields:
-            unique_fields.append(field['name'])
-
-# ******** Open Sysmon KQL Parser template ****************
+# ******** Processing Sysmon Schema and Jinja template ****************
 log.info('Reading KQL parser template')
-kql_parser_template = Template(open('templates/kql/sysmon_parser.txt').read())
-
-# ******** Processing Sysmon Events and Jinja template ****************
-log.info('Processing Jinja template')
-sysmon_for_render = copy.deepcopy(all_sysmon)
-parser = kql_parser_template.render(sysmon=sysmon_for_render, uniquesysmon=unique_fields, today=date.today(), sysmonversion=sysmon_version, schemaversion=sysmon_manifest['schemaversion'], binaryversion=sysmon_manifest['binaryversion'])
+kql_parser_template = Template(open(path.join(TEMPLATES_DIR, 'kql/sysmon_parser.txt')).read())
+parser = kql.render_parser(kql_parser_template, sysmon_schema, sysmon_version)
 
 # ******** Creating File ****************
 log.info('Creating Parser in: {}'.format(output_file_path))